@@ -0,0 +1,258 @@
+import warnings
+
+import lxml.html
+import pytest
+
+from tradezeroapi import portfolio as portfolio_module
+from tradezeroapi.enums import OrderType, PortfolioTab
+from tradezeroapi.portfolio import Portfolio, PORTFOLIO_COLS, ACTIVE_ORDER_COLS, INVENTORY_COLS
+
+PORTFOLIO_HTML = """
+<table id="opTable-1">
+  <thead><tr><th>Symbol</th><th>Type</th></tr></thead>
+  <tbody>
+    <tr><td>AAPL</td><td>Long</td><td>1,100</td><td>1.10</td><td>1.20</td><td>1.30</td><td>0.10</td><td>1%</td>
+        <td>-4.00</td><td>5</td><td>No</td></tr>
+    <tr><td>AMD</td><td>Short</td><td>100</td><td>2.10</td><td>2.20</td><td>2.30</td><td>0.10</td><td>2%</td>
+        <td>-1.00</td><td>3</td><td>Yes</td></tr>
+  </tbody>
+</table>
+"""
+
+EMPTY_PORTFOLIO_HTML = """
+<table id="opTable-1">
+  <tbody><tr><td colspan="11">You have no open positions.</td></tr></tbody>
+</table>
+"""
+
+ACTIVE_ORDERS_HTML = """
+<div id="portfolio-content-tab-ao-1"><table id="aoTable-1"><tbody>
+  <tr order-id="S.101"><td class="red">CANCEL</td><td>1</td><td>AAPL</td><td>buy</td><td>100</td><td>LMT</td>
+      <td>open</td><td>DAY</td><td>1.50</td><td></td><td>10:00:00</td></tr>
+  <tr order-id="S.102"><td class="red">CANCEL</td><td>2</td><td>AMD</td><td>sell</td><td>200</td><td>MKT</td>
+      <td>open</td><td>DAY</td><td></td><td></td><td>10:01:00</td></tr>
+</tbody></table></div>
+"""
+
+INVENTORY_HTML = """
+<table id="locate-inventory-table">
+  <thead><tr><th>Symbol</th><th>Available</th><th>Unavailable</th><th>Pre-Borrow</th><th></th>
+      <th>Action</th></tr></thead>
+  <tbody><tr><td>AAPL</td><td>100</td><td>0</td><td>0</td><td><button>x</button></td><td>Sell</td></tr></tbody>
+</table>
+"""
+
+
+class StubDriver:
+    """Serves a fixed page source, and answers the row-count probe of Portfolio._count_rows"""
+
+    def __init__(self, body: str):
+        self.html = f"<html><body>{body}</body></html>"
+        self.page_source_reads = 0
+        self.clicks = []
+        self.click_result = True
+
+    @property
+    def page_source(self):
+        self.page_source_reads += 1
+        return self.html
+
+    def click_element(self, element_locator):
+        self.clicks.append(element_locator)
+        return self.click_result
+
+    def execute_script(self, script, table_id):
+        table = lxml.html.fromstring(self.html).get_element_by_id(table_id, None)
+        if table is None:
+            return 0
+        return sum(len(row.xpath('./td')) > 1 for row in table.iter('tr'))
+
+
+def make_portfolio(body: str) -> Portfolio:
+    return Portfolio(StubDriver(body))
+
+
+def test_portfolio_converts_numeric_columns():
+    df = make_portfolio(PORTFOLIO_HTML).portfolio()
+
+    assert list(df.index) == ['AAPL', 'AMD']
+    assert list(df.columns) == list(PORTFOLIO_COLS[1:])
+    assert df.loc['AAPL', 'qty'] == 1100
+    assert df.loc['AMD', 'entry'] == pytest.approx(2.20)
+    assert df.loc['AAPL', '%change'] == '1%'
+    assert df.loc['AAPL', 'type'] == 'Long'
+
+
+def test_portfolio_placeholder_row_is_empty():
+    portfolio = make_portfolio(EMPTY_PORTFOLIO_HTML)
+
+    with pytest.warns(UserWarning, match='Portfolio is empty'):
+        assert portfolio.portfolio() is None
+    assert portfolio.invested('AAPL') is False
+
+
+def test_invested_and_open_orders():
+    portfolio = make_portfolio(PORTFOLIO_HTML)
+
+    assert portfolio.invested('aapl') is True
+    assert portfolio.invested('tsla') is False
+    assert list(portfolio.open_orders().index) == ['AAPL']
+
+
+def test_active_orders_skip_cancel_column_and_add_order_id():
+    df = make_portfolio(ACTIVE_ORDERS_HTML).get_active_orders()
+
+    assert list(df.columns) == [*ACTIVE_ORDER_COLS, 'order_id']
+    assert list(df['order_id']) == ['S.101', 'S.102']
+    assert list(df['ref_number']) == [1, 2]
+    assert list(df['symbol']) == ['AAPL', 'AMD']
+
+
+def test_active_orders_filters():
+    portfolio = make_portfolio(ACTIVE_ORDERS_HTML)
+
+    assert list(portfolio.get_active_orders(symbol='AMD')['order_id']) == ['S.102']
+    assert list(portfolio.get_active_orders(order_type=OrderType.Limit)['order_id']) == ['S.101']
+    with pytest.warns(UserWarning, match='FILTERED'):
+        assert portfolio.get_active_orders(symbol='AMD', order_type=OrderType.Limit) == []
+
+
+def test_symbol_present_in_active_orders_does_not_warn():
+    portfolio = make_portfolio(ACTIVE_ORDERS_HTML)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert portfolio.symbol_present_in_active_orders('amd') is True
+        assert portfolio.symbol_present_in_active_orders('tsla') is False
+
+
+def test_active_order_ids_for():
+    portfolio = make_portfolio(ACTIVE_ORDERS_HTML)
+
+    assert portfolio._active_order_ids_for('AAPL') == ['101']
+    assert portfolio._active_order_ids_for('AAPL', OrderType.Market) == []
+    assert portfolio._active_order_ids_for('AMD', OrderType.Market) == ['102']
+
+
+def test_inventory_skips_column_and_header_row():
+    df = make_portfolio(INVENTORY_HTML).get_inventory()
+
+    assert list(df.columns) == list(INVENTORY_COLS)
+    assert df.values.tolist() == [['AAPL', '100', '0', '0', 'Sell']]
+
+
+def test_missing_table_gives_empty_frame():
+    df = make_portfolio('').get_inventory()
+
+    assert df.empty
+    assert list(df.columns) == list(INVENTORY_COLS)
+
+
+def test_spanning_footer_row_keeps_other_rows():
+    html = PORTFOLIO_HTML.replace('</tbody>', '<tr><td colspan="999">Totals</td></tr></tbody>')
+    portfolio = make_portfolio(html)
+
+    assert list(portfolio.portfolio().index) == ['AAPL', 'AMD']
+    assert portfolio.invested('AAPL') is True
+
+
+def test_changed_table_layout_raises():
+    html = PORTFOLIO_HTML.replace('</tr>\n    <tr>', '<td>extra</td></tr>\n    <tr>').replace(
+        '<td>Yes</td></tr>', '<td>Yes</td><td>extra</td></tr>')
+
+    with pytest.raises(ValueError, match='layout has changed'):
+        make_portfolio(html).invested('AAPL')
+
+
+def test_changed_active_orders_layout_raises():
+    html = ACTIVE_ORDERS_HTML.replace('<td>10:00:00</td>', '<td>10:00:00</td><td>extra</td>')
+    portfolio = make_portfolio(html)
+
+    with pytest.raises(ValueError, match='layout has changed'):
+        portfolio.get_active_orders()
+    with pytest.raises(ValueError, match='layout has changed'):
+        portfolio._active_order_ids_for('AAPL')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(portfolio_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_portfolio_is_cached_within_ttl(clock):
+    portfolio = make_portfolio(PORTFOLIO_HTML)
+
+    portfolio.portfolio()
+    clock[0] += portfolio._portfolio_ttl / 2
+    assert portfolio.invested('AAPL') is True
+    assert list(portfolio.open_orders().index) == ['AAPL']
+    assert portfolio.driver.page_source_reads == 1
+
+
+def test_portfolio_is_read_again_after_ttl(clock):
+    portfolio = make_portfolio(PORTFOLIO_HTML)
+
+    portfolio.portfolio()
+    clock[0] += portfolio._portfolio_ttl
+    portfolio.portfolio()
+    assert portfolio.driver.page_source_reads == 2
+
+
+def test_portfolio_is_read_again_after_invalidate(clock):
+    portfolio = make_portfolio(PORTFOLIO_HTML)
+
+    portfolio.portfolio()
+    portfolio.invalidate_portfolio()
+    portfolio.portfolio()
+    assert portfolio.driver.page_source_reads == 2
+
+
+def test_cached_portfolio_is_a_copy(clock):
+    portfolio = make_portfolio(PORTFOLIO_HTML)
+
+    df = portfolio.portfolio()
+    df.drop('AAPL', inplace=True)
+    df.loc['AMD', 'qty'] = 0
+
+    df = portfolio.portfolio()
+    assert list(df.index) == ['AAPL', 'AMD']
+    assert df.loc['AMD', 'qty'] == 100
+    assert portfolio.driver.page_source_reads == 1
+
+
+def test_switching_to_the_active_tab_does_not_click():
+    portfolio = make_portfolio('')
+
+    portfolio._switch_portfolio_tab(PortfolioTab.active_orders)
+    portfolio._switch_portfolio_tab(PortfolioTab.active_orders)
+    assert portfolio.driver.clicks == [Portfolio._TAB_LOCATORS[PortfolioTab.active_orders]]
+    assert portfolio._active_tab == PortfolioTab.active_orders
+
+    portfolio._switch_portfolio_tab(PortfolioTab.closed_positions)
+    assert len(portfolio.driver.clicks) == 2
+    assert portfolio._active_tab == PortfolioTab.closed_positions
+
+
+def test_failed_tab_click_is_not_remembered():
+    portfolio = make_portfolio('')
+    portfolio._switch_portfolio_tab(PortfolioTab.closed_positions)
+
+    portfolio.driver.click_result = False
+    portfolio._switch_portfolio_tab(PortfolioTab.active_orders)
+    assert portfolio._active_tab is None
+
+    portfolio.driver.click_result = True
+    portfolio._switch_portfolio_tab(PortfolioTab.active_orders)
+    assert len(portfolio.driver.clicks) == 3
+    assert portfolio._active_tab == PortfolioTab.active_orders
+
+
+def test_switching_after_invalidate_clicks_again():
+    portfolio = make_portfolio('')
+
+    portfolio._switch_portfolio_tab(PortfolioTab.active_orders)
+    portfolio.invalidate_portfolio_tab()
+    portfolio._switch_portfolio_tab(PortfolioTab.active_orders)
+    assert len(portfolio.driver.clicks) == 2
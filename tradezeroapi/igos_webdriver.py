@@ -4,36 +4,38 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException, NoSuchElementException, \
     StaleElementReferenceException
-import time
 
 
 class Chrome(webdriver.Chrome):
 
-    def click_element(self, element_locator: tuple):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # lookups fail fast instead of polling on every miss, waiting is done explicitly with WebDriverWait
+        self.implicitly_wait(0)
 
+    def click_element(self, element_locator: tuple) -> bool:
+        """
+        Wait for an element to be clickable and click it, retrying once if the click is intercepted.
+
+        :param element_locator: (By, value) tuple
+        :return: True if the element was clicked, False otherwise
+        """
         max_wait = 10
         try:
             element = WebDriverWait(self, max_wait).until(
                 EC.element_to_be_clickable(element_locator)
             )
             try:
-                self.execute_script("arguments[0].scrollIntoView();", element)
+                self.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
                 element.click()
+                return True
             except ElementClickInterceptedException:
-                print("Element click intercepted. Scrolling to the element and retrying...")
-                # Scroll to the top of the page
-                self.execute_script("arguments[0].scrollIntoView();", element)
-                time.sleep(1)  # Wait for 1 second before retrying
-                # Retry clicking the element
+                print("Element click intercepted. Retrying...")
+                try:
+                    WebDriverWait(self, 2).until(EC.element_to_be_clickable(element_locator)).click()
+                    return True
+                except (ElementClickInterceptedException, TimeoutException):
+                    print("The element is still not clickable after retrying the intercepted click")
         except TimeoutException:
             print("The element is not clickable after waiting for 10 seconds")
-        # Alternative way to handle click interception
-        for _ in range(3):  # Retry up to 3 times
-            try:
-                element = self.find_element(*element_locator)
-                element.click()
-                break  # If click is successful, exit the loop
-            except ElementClickInterceptedException:
-                print("Element click intercepted. Retrying...")
-                self.execute_script("window.scrollTo(0, 0);")
-                time.sleep(1)  # Wait for 1 second before retrying
+        return False
@@ -120,6 +120,8 @@ class TradeZero(Time):
         try:
             self.driver.find_element(By.ID, "login")
             self.login()
+            self.Portfolio.invalidate_portfolio()
+            self.Portfolio.invalidate_portfolio_tab()
 
             self.Watchlist.restore()
 
@@ -129,6 +131,8 @@ class TradeZero(Time):
 
         except NoSuchElementException:
             self.driver.get("https://standard.tradezeroweb.us/")
+            self.Portfolio.invalidate_portfolio()
+            self.Portfolio.invalidate_portfolio_tab()
             if self._dom_fully_loaded(150):
 
                 if self.hide_attributes:
@@ -415,6 +419,7 @@ class TradeZero(Time):
         price_input.send_keys(limit_price)
 
         self.driver.find_element(By.ID, f"trading-order-button-{order_direction}").click()
+        self.Portfolio.invalidate_portfolio()
 
         if log_info is True:
             print(f"Time: {self.time}, Order direction: {order_direction}, Symbol: {symbol}, "
@@ -458,6 +463,7 @@ class TradeZero(Time):
         input_quantity.send_keys(share_amount)
 
         self.driver.find_element(By.ID, f"trading-order-button-{order_direction}").click()
+        self.Portfolio.invalidate_portfolio()
 
         if log_info is True:
             print(f"Time: {self.time}, Order direction: {order_direction}, Symbol: {symbol}, "
@@ -509,6 +515,7 @@ class TradeZero(Time):
         price_input.send_keys(stop_price)
 
         self.driver.find_element(By.ID, f"trading-order-button-{order_direction}").click()
+        self.Portfolio.invalidate_portfolio()
 
         if log_info is True:
             print(f"Time: {self.time}, Order direction: {order_direction}, Symbol: {symbol}, "
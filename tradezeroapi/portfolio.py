@@ -1,23 +1,140 @@
 from __future__ import annotations
 
 import warnings
+
+import lxml.html
+import numpy as np
 import pandas as pd
 
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException, NoSuchElementException, \
-    StaleElementReferenceException
+from selenium.common.exceptions import TimeoutException
 from typing import overload, Optional, Literal
 import time
 
 from .enums import PortfolioTab, OrderType
 
+# parses the page source as UTF-8 bytes, instead of letting lxml re-encode a large Python str
+_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+# column names of each table, in the order of their cells
+PORTFOLIO_COLS = ('symbol', 'type', 'qty', 'p_close', 'entry', 'price', 'change', '%change', 'day_pnl', 'pnl',
+                  'overnight')
+ACTIVE_ORDER_COLS = ('ref_number', 'symbol', 'side', 'qty', 'type', 'status', 'tif', 'limit', 'stop', 'placed')
+CLOSED_POSITION_COLS = ('Symbol', 'Type', 'Qty', 'p_close', 'Entry', 'Close', 'PNL', 'Day PNL', 'Opened', 'Closed',
+                        'O/N')
+INVENTORY_COLS = ('Symbol', 'Available', 'Unavailable', 'Pre-Borrow', 'Action')
+
 
 class Portfolio:
+    # CSS locator of the link of each portfolio tab
+    _TAB_LOCATORS = {tab: (By.CSS_SELECTOR, f"a#{tab.value}") for tab in PortfolioTab}
+
     def __init__(self, driver: WebDriver):
         self.driver = driver
+        # (monotonic timestamp, parsed table) of the last portfolio read, reused for _portfolio_ttl seconds
+        self._portfolio_cache: Optional[tuple[float, Optional[pd.DataFrame]]] = None
+        self._portfolio_ttl = 0.5
+        # the portfolio tab that was last switched to, None when unknown (e.g. after a page load)
+        self._active_tab: Optional[PortfolioTab] = None
+
+    def _get_table(self, table_id: str) -> Optional[lxml.html.HtmlElement]:
+        """
+        Fetch the page source once and locate the table with the given ID in it.
+
+        :param table_id: the id attribute of the <table> element
+        :return: lxml element of the table, or None if the table is not on the page
+        """
+        root = lxml.html.fromstring(self.driver.page_source.encode('utf-8', errors='replace'), parser=_HTML_PARSER)
+        try:
+            return root.get_element_by_id(table_id)
+        except KeyError:
+            return None
+
+    def _count_rows(self, table_id: str) -> int:
+        """
+        Count the rows of a table holding more than one <td>, in a single script call.
+
+        Header rows and single-cell placeholder rows (e.g. "You have no open positions.") are not counted,
+        so this only answers whether the table is empty; checking the layout is left to the parser.
+
+        :param table_id: the id attribute of the <table> element
+        :return: number of data rows, 0 if the table is not on the page
+        """
+        return self.driver.execute_script("""
+            const table = document.getElementById(arguments[0]);
+            if (!table) return 0;
+            return [...table.querySelectorAll('tr')]
+                .filter(row => row.querySelectorAll(':scope > td').length > 1).length;
+        """, table_id)
+
+    @staticmethod
+    def _data_rows(table: lxml.html.HtmlElement, table_id: str, cells_per_row: int) -> list[tuple]:
+        """
+        Get the data rows of a table along with their <td> elements.
+
+        Rows without any <td> (headers) and rows holding a single <td> (placeholders such as
+        "You have no open positions." or full-width footers) are skipped.
+
+        :param table: lxml element of the table
+        :param table_id: the id attribute of the table, for the error message
+        :param cells_per_row: number of <td> each data row must hold
+        :return: list of (row, cells) tuples
+        :raises ValueError: if a data row holds a different number of <td>, i.e. the table layout changed
+        """
+        rows = []
+        for row in table.xpath('.//tr[td]'):
+            cells = row.xpath('./td')
+            if len(cells) == 1:
+                continue
+            if len(cells) != cells_per_row:
+                raise ValueError(f'Error: a row of table {table_id} has {len(cells)} cells, '
+                                 f'expected {cells_per_row}; the table layout has changed')
+            rows.append((row, cells))
+        return rows
+
+    def _table_to_df(self, table_id: str, columns: tuple[str, ...], id_attr: Optional[str] = None,
+                     skip_columns: tuple[int, ...] = (), convert_numeric: bool = False) -> pd.DataFrame:
+        """
+        Parse the rows of a table straight into a DataFrame with lxml, without going through pd.read_html.
+
+        Header rows and single-cell placeholder rows such as "You have no open positions." are skipped,
+        see _data_rows().
+
+        :param table_id: the id attribute of the <table> element
+        :param columns: the names of the columns to keep
+        :param id_attr: name of a <tr> attribute to add as an extra column, e.g. 'order-id' -> 'order_id'
+        :param skip_columns: indexes of the cells to leave out of each row (e.g. a button column)
+        :param convert_numeric: if True, convert the columns that only hold numbers, like pd.read_html would
+        :return: pandas.DataFrame, empty if the table is missing or has no rows
+        :raises ValueError: if a data row doesn't hold one <td> per column (plus the skipped ones)
+        """
+        cells_per_row = len(columns) + len(skip_columns)
+        id_columns = [] if id_attr is None else [id_attr.replace('-', '_')]
+
+        # cheap probe first, so an empty table doesn't cost a full page_source download and parse
+        if self._count_rows(table_id) == 0:
+            return pd.DataFrame(columns=[*columns, *id_columns])
+
+        table = self._get_table(table_id)
+        rows = [] if table is None else self._data_rows(table, table_id, cells_per_row)
+
+        data = []
+        for row, cells in rows:
+            row_data = [cell.text_content().strip() for idx, cell in enumerate(cells) if idx not in skip_columns]
+            if id_attr is not None:
+                row_data.append(row.get(id_attr))
+            data.append(row_data)
+
+        df = pd.DataFrame(data, columns=[*columns, *id_columns])
+        if convert_numeric:
+            for column in columns:
+                try:
+                    df[column] = pd.to_numeric(df[column].str.replace(',', '', regex=False))
+                except ValueError:
+                    pass
+        return df
 
     @overload
     def portfolio(self, return_type: Literal['df'] = 'df') -> Optional[pd.DataFrame]:
@@ -32,26 +149,45 @@ class Portfolio:
         return the Portfolio table as a pandas.DataFrame or nested dict, with the symbol column as index.
         the column names are the following: 'type', 'qty', 'p_close', 'entry',
         'price', 'change', '%change', 'day_pnl', 'pnl', 'overnight'
-        note that if the portfolio is empty Pandas won't be able to locate the table,
-        and therefore will return None
+        the table is parsed from the page source with lxml; if the portfolio is empty
+        (no rows, or only the "You have no open positions." placeholder) None is returned
+
+        the parsed table is cached for half a second, so consecutive calls (e.g. invested() in a loop)
+        don't re-download and re-parse the page. call invalidate_portfolio() to force a fresh read.
 
         :param return_type: 'df' or 'dict'
         :return: pandas.DataFrame or None if table empty
         """
-        portfolio_symbols = self.driver.find_elements(By.XPATH, '//*[@id="opTable-1"]/tbody/tr/td[1]')
-        df = pd.read_html(self.driver.page_source, attrs={'id': 'opTable-1'})[0]
+        now = time.monotonic()
+        if self._portfolio_cache is None or now - self._portfolio_cache[0] >= self._portfolio_ttl:
+            self._portfolio_cache = (now, self._read_portfolio())
 
-        if len(portfolio_symbols) == 0 or df.loc[0, 0].lower() == "you have no open positions.":
-            warnings.warn('Portfolio is empty')
+        df = self._portfolio_cache[1]
+        if df is None:
             return None
-
-        df.columns = [
-            'symbol', 'type', 'qty', 'p_close', 'entry', 'price', 'change', '%change', 'day_pnl', 'pnl', 'overnight'
-        ]
-        df = df.set_index('symbol')
         if return_type == 'dict':
             return df.to_dict('index')
-        return df
+        return df.copy()
+
+    def invalidate_portfolio(self) -> None:
+        """
+        Drop the cached portfolio table, so the next portfolio() call reads it from the page again.
+        """
+        self._portfolio_cache = None
+
+    def _read_portfolio(self) -> Optional[pd.DataFrame]:
+        """
+        Read and parse the Portfolio table from the page, see portfolio()
+
+        :return: pandas.DataFrame or None if table empty
+        """
+        df = self._table_to_df('opTable-1', PORTFOLIO_COLS, convert_numeric=True)
+
+        if len(df) == 0:
+            warnings.warn('Portfolio is empty')
+            return None
+
+        return df.set_index('symbol')
 
     def close_position_overview(self) -> pd.DataFrame:
         """
@@ -71,27 +207,11 @@ class Portfolio:
         +-------+------+-----+---------+-------+-------+-------+---------+----------------+----------------+-----+
         """
 
-        # First, click on the 'Closed Positions' tab to make sure it's active
-        self.driver.find_element(By.ID, "portfolio-tab-cp-1").click()
+        # First, switch to the 'Closed Positions' tab to make sure it's active
+        self._switch_portfolio_tab(tab=PortfolioTab.closed_positions)
 
-        # Find all rows in the table
-        rows = self.driver.find_elements(By.XPATH, '//table[@id="cpTable-1"]/tbody/tr')
-
-        # List to hold all rows of data
-        data: list[list[str]] = []
-
-        # Extract data from each row
-        for row in rows:
-            cells = row.find_elements(By.TAG_NAME, 'td')
-            row_data: list[str] = [cell.text for cell in cells]
-            data.append(row_data)
-
-        # Column names (these should be customized to match the specific table's column headers)
-        column_names: list[str] = ["Symbol", "Type", "Qty", "p_close", "Entry", "Close", "PNL", "Day PNL", "Opened",
-                                   "Closed", "O/N"]
-
-        # Create the DataFrame
-        df = pd.DataFrame(data, columns=column_names)
+        # Create the DataFrame from the table, located in a single page_source fetch
+        df = self._table_to_df('cpTable-1', CLOSED_POSITION_COLS, convert_numeric=True)
 
         # Set 'Symbol' column as the index of the DataFrame
         df.set_index('Symbol', inplace=True)
@@ -101,10 +221,10 @@ class Portfolio:
 
     def get_inventory(self):
         """
-        Extracts inventory data from a specific HTML table using Selenium.
+        Extracts inventory data from a specific HTML table of the page source.
 
-        This method identifies a table within a webpage by its ID, iterates through
-        each row of the table, and extracts text from each cell while excluding a
+        This method identifies a table within a webpage by its ID, parses the text of
+        every cell of the table from the page source with lxml, excluding a
         specific, undesired column. It compiles the text into a pandas DataFrame
         with predefined column headers. Rows without any table data cells are ignored.
 
@@ -112,37 +232,8 @@ class Portfolio:
             pandas.DataFrame: A DataFrame containing the inventory data, structured
             according to predefined headers.
         """
-        # Find the table by ID
-        table = self.driver.find_element(By.ID, "locate-inventory-table")
-
-        # Find all the rows in the table
-        rows = table.find_elements(By.TAG_NAME, "tr")
-
-        # Specify the desired headers
-        headers = ['Symbol', 'Available', 'Unavailable', 'Pre-Borrow', 'Action']
-
-        # Initialize an empty list to hold all row data
-        all_row_data = []
-
-        # Iterate over the rows
-        for row in rows:
-            # Find all cell tags in this row
-            cells = row.find_elements(By.TAG_NAME, "td")
-            if not cells:
-                # If there are no td tags, it might be the header row with th tags
-                cells = row.find_elements(By.TAG_NAME, "th")
-            # Get the text from each cell, ignoring the fifth cell (if exists)
-            row_data = [cell.text for idx, cell in enumerate(cells) if idx != 4]
-            # Append the row's text to the aggregated list
-            all_row_data.append(row_data)
-
-        # Exclude any empty rows if they exist
-        all_row_data = [row for row in all_row_data if row]
-
-        # Create the DataFrame assuming all data rows have the same number of columns as the headers
-        df = pd.DataFrame(all_row_data, columns=headers)
-
-        return df
+        # Create the DataFrame from the table rows, ignoring the fifth cell
+        return self._table_to_df('locate-inventory-table', INVENTORY_COLS, skip_columns=(4,))
 
     def open_orders(self) -> pd.DataFrame:
         """
@@ -166,24 +257,32 @@ class Portfolio:
         :param symbol: str: e.g: 'aapl', 'amd', 'NVDA', 'GM'
         :return: bool
         """
-        data = self.portfolio('dict')
-        if data is None:
-            return False
-
-        return symbol.upper() in data.keys()
+        df = self.portfolio()
+        return df is not None and symbol.upper() in df.index
 
     def _switch_portfolio_tab(self, tab: PortfolioTab) -> None:
         """
         Switch the focus to a given tab
 
         Note that this is idem-potent, meaning you can switch twice consecutively in the same tab.
+        The last successfully selected tab is remembered, so switching to the tab that is already active does
+        nothing; call invalidate_portfolio_tab() if the tab was changed outside of this class.
 
         :param tab: enum of PortfolioTab
         :return: None
         """
-        # portfolio_tab = self.driver.find_element(By.ID, tab)
-        portfolio_tab_locator = (By.CSS_SELECTOR, f"a#{tab.value}")
-        self.driver.click_element(portfolio_tab_locator)
+        if self._active_tab == tab:
+            return
+        if self.driver.click_element(self._TAB_LOCATORS[tab]):
+            self._active_tab = tab
+        else:
+            self._active_tab = None
+
+    def invalidate_portfolio_tab(self) -> None:
+        """
+        Forget which portfolio tab is active, so the next tab switch clicks the tab again.
+        """
+        self._active_tab = None
 
     def get_active_orders(self, symbol=None, order_type=None, return_type: str = 'df'):
         """
@@ -192,25 +291,19 @@ class Portfolio:
         :param return_type: 'df' or 'dict'
         :return: dataframe or dictionary (based on the return_type parameter)
         """
-        active_orders = self.driver.find_elements(By.XPATH, '//*[@id="aoTable-1"]/tbody/tr[@order-id]')
-        if len(active_orders) == 0:
+        # skip the first column which contains the button "CANCEL"
+        df = self._table_to_df('aoTable-1', ACTIVE_ORDER_COLS, id_attr='order-id', skip_columns=(0,),
+                               convert_numeric=True)
+        # df = df.set_index('symbol')  # cant set it as a column since its not always unique
+        if len(df) == 0:
             warnings.warn('There are no active orders')
             return []
 
-        order_ids = [order.get_attribute("order-id") for order in active_orders]
-
-        df = pd.read_html(self.driver.page_source, attrs={'id': 'aoTable-1'})[0]
-        df = df.drop(0, axis=1)  # remove the first column which contains the button "CANCEL"
-        df.columns = ['ref_number', 'symbol', 'side', 'qty', 'type', 'status', 'tif', 'limit', 'stop', 'placed']
-        # df = df.set_index('symbol')  # cant set it as a column since its not always unique
-
-        df['order_id'] = order_ids
+        filt = np.ones(len(df), dtype=bool)  # Initialize filt with all True values
         if symbol:
-            filt = (df['symbol'] == symbol)
-        else:
-            filt = pd.Series([True] * len(df))  # Initialize filt with all True values
+            filt &= (df['symbol'].to_numpy() == symbol)
         if order_type:
-            filt = filt & (df['type'] == order_type)
+            filt &= (df['type'].to_numpy() == OrderType(order_type).value)
         fdf = df[filt]
 
         if len(fdf) == 0:
@@ -228,7 +321,43 @@ class Portfolio:
         :param symbol:
         :return: True or False
         """
-        return symbol.upper() in self.get_active_orders()['symbol'].values
+        return len(self._active_order_ids_for(symbol.upper())) > 0
+
+    def _active_order_ids_for(self, symbol: str, order_type: OrderType = None) -> list[str]:
+        """
+        Get the ids (without the 'S.' prefix) of the active orders for a given symbol and order type.
+
+        Only the three needed columns are read from the parsed table, skipping the DataFrame that
+        get_active_orders() would build.
+
+        :param symbol: upper case symbol
+        :param order_type: enum of OrderType, None for any type
+        :return: list of order ids
+        :raises ValueError: if a row doesn't hold the CANCEL cell plus one <td> per ACTIVE_ORDER_COLS column
+        """
+        if self._count_rows('aoTable-1') == 0:
+            return []
+
+        table = self._get_table('aoTable-1')
+        if table is None:
+            return []
+
+        # the first cell holds the CANCEL button, followed by one cell per ACTIVE_ORDER_COLS column
+        rows = [
+            (row, cells) for row, cells in self._data_rows(table, 'aoTable-1', len(ACTIVE_ORDER_COLS) + 1)
+            if row.get('order-id') is not None
+        ]
+        symbol_idx = ACTIVE_ORDER_COLS.index('symbol') + 1
+        type_idx = ACTIVE_ORDER_COLS.index('type') + 1
+        order_ids = [row.get('order-id') for row, _ in rows]
+        symbols = [cells[symbol_idx].text_content().strip() for _, cells in rows]
+        types = [cells[type_idx].text_content().strip() for _, cells in rows]
+
+        type_value = OrderType(order_type).value if order_type else None
+        return [
+            order_id.replace('S.', '') for order_id, symbol_, type_ in zip(order_ids, symbols, types)
+            if symbol_ == symbol and (type_value is None or type_ == type_value)
+        ]
 
     def cancel_active_order(self, symbol: str, order_type: OrderType = None) -> None:
         """
@@ -241,27 +370,31 @@ class Portfolio:
         symbol = symbol.upper()
         self._switch_portfolio_tab(tab=PortfolioTab.active_orders)
 
-        df = self.get_active_orders(symbol, order_type)
-        if len(df) == 0:
+        ids_to_cancel = self._active_order_ids_for(symbol, order_type)
+        if len(ids_to_cancel) == 0:
             return
-        ids_to_cancel = df['order_id'].values
-        ids_to_cancel = [x.replace('S.', '') for x in ids_to_cancel]
-
-        for order_id in ids_to_cancel:
-            # xpath = f'//div[@id="portfolio-content-tab-ao-1"]//*[@order-id="{order_id}"]/td[@class="red"]'
-            # xpath = f'//div[@id="portfolio-content-tab-ao-1"]//tr/td[text()="{symbol}"]/ancestor::tr/td[text()="CANCEL"]'
-            try:
-                xpath = f'//div[@id="portfolio-content-tab-ao-1"]//tr[@order-id="{order_id}"]/td[text()="CANCEL"]'
-                cancel_button = self.driver.find_element(
-                    By.XPATH, xpath)
-                # print(f"found cancel button {cancel_button}")
-            except NoSuchElementException:
-                print(f"Could not find cancel button for order {order_id}")
-                continue
-            try:
-                cancel_button.click()
-            except StaleElementReferenceException:
-                print(f"cancel button is unavailalble {order_id}")
-                continue
 
-        time.sleep(2)
+        # click every CANCEL button from a single script call, returns the ids whose button wasn't found
+        not_found = self.driver.execute_script("""
+            const container = document.getElementById('portfolio-content-tab-ao-1');
+            return arguments[0].filter(id => {
+                const row = container && container.querySelector(`tr[order-id="${CSS.escape(id)}"]`);
+                const button = row && [...row.cells].find(cell => cell.textContent.trim() === 'CANCEL');
+                if (button) button.click();
+                return !button;
+            });
+        """, ids_to_cancel)
+        if not_found:
+            print(f"Could not find cancel button for orders {not_found}")
+
+        clicked_ids = [order_id for order_id in ids_to_cancel if order_id not in not_found]
+        try:
+            # the rows are removed from the table once the orders are cancelled
+            WebDriverWait(self.driver, 2).until(lambda driver: driver.execute_script("""
+                const container = document.getElementById('portfolio-content-tab-ao-1');
+                return !container || arguments[0].every(
+                    id => !container.querySelector(`tr[order-id="${CSS.escape(id)}"]`)
+                );
+            """, clicked_ids))
+        except TimeoutException:
+            print(f"orders still present after cancelling {clicked_ids}")